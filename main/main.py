@@ -1,3 +1,5 @@
+import atexit
+import gzip
 import json
 import os
 import time
@@ -17,6 +19,10 @@ from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 import pytz
 import os
+try:
+    import psutil
+except ImportError:
+    psutil = None
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from tkinter.messagebox import showinfo
@@ -61,6 +67,10 @@ class MAIScheduleApp:
         fetch_btn = ttk.Button(input_frame, text="Получить расписание", command=self.fetch_schedule)
         fetch_btn.grid(row=0, column=4, padx=10)
 
+        refresh_btn = ttk.Button(input_frame, text="Обновить с сайта",
+                                 command=lambda: self.fetch_schedule(force=True))
+        refresh_btn.grid(row=0, column=5, padx=5)
+
         # Панель информации о группе
         self.info_frame = ttk.LabelFrame(main_frame, text="Информация о группе", padding=10)
         self.info_frame.pack(fill=tk.X, pady=5)
@@ -106,9 +116,11 @@ class MAIScheduleApp:
 
         # Переменные для хранения данных
         self.current_schedule = None
+        self.current_changes = None
+        self.change_history = None
         self.group_info = None
 
-    def fetch_schedule(self):
+    def fetch_schedule(self, force=False):
         group = self.group_entry.get().strip()
         week = self.week_entry.get().strip()
 
@@ -116,6 +128,9 @@ class MAIScheduleApp:
             showinfo("Ошибка", "Введите номер группы и недели")
             return
 
+        self.current_changes = None
+        self.change_history = None
+
         try:
             # Декодируем информацию о группе
             inst_num, edu_type, course = self.parser.decode_group(group)
@@ -134,9 +149,12 @@ class MAIScheduleApp:
                 'education_type': edu_type
             }
 
-            # Проверяем кэш и базу данных
-            cached = self.parser.get_cached_schedule(group, week)
-            db_schedule = self.parser.db.get_schedule(group, week)
+            # Проверяем кэш и базу данных, если не требуется обновление с сайта
+            cached = None if force else self.parser.get_cached_schedule(group, week)
+            db_schedule = None if force else self.parser.db.get_schedule(group, week)
+
+            if cached or db_schedule:
+                self.change_history = self.parser.db.get_changes(group, week)
 
             if cached:
                 self.current_schedule = cached["schedule"]
@@ -165,15 +183,32 @@ class MAIScheduleApp:
             )
 
             if html:
-                self.current_schedule = self.parser.parse_schedule(html)
-                self.parser.save_to_cache(group, week, {
-                    "education_type": edu_type,
-                    "schedule": self.current_schedule
-                })
-                self.parser.db.save_schedule(self.group_info, self.current_schedule)
+                schedule = self.parser.parse_schedule(html)
+                self.current_changes = self.parser.db.update_schedule(self.group_info, schedule)
+                self.current_schedule = schedule
+
+                # Кэш переписывается только при первой загрузке или при наличии изменений
+                if self.current_changes is None or self.current_changes:
+                    self.parser.save_to_cache(group, week, {
+                        "education_type": edu_type,
+                        "schedule": self.current_schedule
+                    })
+
                 self.display_schedule()
                 self.add_to_calendar_btn.config(state=tk.NORMAL)
-                showinfo("Успех", "Расписание успешно загружено")
+
+                if self.current_changes is not None:
+                    message = f"Расписание обновлено, изменений: {len(self.current_changes)}"
+                else:
+                    message = "Расписание успешно загружено"
+
+                stats = self.parser.last_fetch_stats
+                if stats:
+                    message += ("\n"
+                                f"Запросов: {stats['requests']}, заблокировано: {stats['blocked_requests']}\n"
+                                f"Загружено: {stats['bytes_loaded'] // 1024} КБ, "
+                                f"сэкономлено ~{stats['bytes_saved_estimate'] // 1024} КБ")
+                showinfo("Успех", message)
             else:
                 showinfo("Ошибка", "Не удалось загрузить расписание")
 
@@ -181,12 +216,20 @@ class MAIScheduleApp:
             showinfo("Ошибка", f"Произошла ошибка: {str(e)}")
 
     def display_schedule(self):
-        if not self.current_schedule:
+        if self.current_schedule is None and not self.current_changes and not self.change_history:
             return
 
         self.schedule_text.delete(1.0, tk.END)
 
-        for day in self.current_schedule:
+        if self.current_changes:
+            self.display_changes(self.current_changes, "Изменения")
+        elif self.change_history:
+            self.display_changes(self.change_history, "История изменений")
+
+        if self.current_schedule == []:
+            self.schedule_text.insert(tk.END, "\nНа этой неделе занятий нет\n")
+
+        for day in self.current_schedule or []:
             self.schedule_text.insert(tk.END, f"\n{day['date']}\n", 'header')
             self.schedule_text.insert(tk.END, "-" * 60 + "\n")
 
@@ -206,6 +249,46 @@ class MAIScheduleApp:
 
         # Настройка тегов для форматирования
         self.schedule_text.tag_config('header', foreground='blue', font=('Arial', 11, 'bold'))
+        self.schedule_text.tag_config('added', foreground='green')
+        self.schedule_text.tag_config('removed', foreground='red', overstrike=True)
+        self.schedule_text.tag_config('moved', foreground='dark orange')
+        self.schedule_text.tag_config('modified', foreground='dark orange')
+
+    def display_changes(self, changes, title):
+        field_names = {
+            'date': 'Дата',
+            'time': 'Время',
+            'subject': 'Предмет',
+            'type': 'Тип',
+            'teacher': 'Преподаватель',
+            'classroom': 'Аудитория'
+        }
+
+        self.schedule_text.insert(tk.END, f"\n{title}\n", 'header')
+        self.schedule_text.insert(tk.END, "-" * 60 + "\n")
+
+        for change in changes:
+            old, new = change['old'], change['new']
+
+            if change['change'] == 'added':
+                line = f"+ {new['date']} {new['time']}: {new['subject']} ({new['type']})"
+            elif change['change'] == 'removed':
+                line = f"- {old['date']} {old['time']}: {old['subject']} ({old['type']})"
+            elif change['change'] == 'moved':
+                line = f"→ {new['subject']} ({new['type']}): {old['date']} {old['time']} → {new['date']} {new['time']}"
+            else:
+                details = ", ".join(
+                    f"{field_names[field]}: {old[field]} → {new[field]}" for field in change['fields']
+                )
+                line = f"~ {new['date']} {new['time']}: {new['subject']} — {details}"
+
+            # Записи истории из БД содержат время обнаружения изменения
+            if change.get('detected_at'):
+                line = f"[{change['detected_at'].replace('T', ' ')}] {line}"
+
+            self.schedule_text.insert(tk.END, line + "\n", change['change'])
+
+        self.schedule_text.insert(tk.END, "-" * 60 + "\n")
 
     def add_to_calendar(self):
         if not self.current_schedule or not self.group_info:
@@ -214,6 +297,16 @@ class MAIScheduleApp:
 
         group = self.group_info['group']
         try:
+            # После обновления с сайта в календарь переносятся только изменения
+            if self.current_changes is not None:
+                if not self.current_changes:
+                    showinfo("Успех", "Изменений нет, календарь актуален")
+                    return
+
+                self.parser._apply_changes_to_google_calendar(group, self.current_changes)
+                showinfo("Успех", "Изменения перенесены в Google Calendar")
+                return
+
             self.parser._add_to_google_calendar(group, self.current_schedule)
             showinfo("Успех", "Расписание добавлено в Google Calendar")
         except Exception as e:
@@ -222,6 +315,8 @@ class MAIScheduleApp:
     def clear_schedule(self):
         self.schedule_text.delete(1.0, tk.END)
         self.current_schedule = None
+        self.current_changes = None
+        self.change_history = None
         self.group_info = None
         self.add_to_calendar_btn.config(state=tk.DISABLED)
         self.institute_label.config(text="")
@@ -312,12 +407,106 @@ class GoogleCalendarManager:
         except Exception as e:
             pass
 
+    def delete_events(self, summary, start_time, end_time):
+        try:
+            events_result = self.service.events().list(
+                calendarId=CALENDAR_ID,
+                timeMin=start_time,
+                timeMax=end_time,
+                singleEvents=True
+            ).execute()
+
+            for event in events_result.get('items', []):
+                if event.get('summary') == summary:
+                    self.service.events().delete(
+                        calendarId=CALENDAR_ID,
+                        eventId=event['id']
+                    ).execute()
+        except Exception as e:
+            pass
+
+
+class MAIScheduleDiff:
+    FIELDS = ('subject', 'type', 'teacher', 'classroom')
+
+    def compare(self, old_schedule, new_schedule):
+        # Занятия индексируются по слоту (дата, время), поэтому сравнение линейно
+        old = self._index(old_schedule)
+        new = self._index(new_schedule)
+
+        changes = []
+        removed = {}
+
+        for slot, lesson in old.items():
+            if slot not in new:
+                removed[slot] = lesson
+                continue
+
+            fields = [field for field in self.FIELDS if lesson.get(field) != new[slot].get(field)]
+            if fields:
+                changes.append(self._change('modified', lesson, new[slot], fields))
+
+        # Пропавшее и появившееся занятие с тем же предметом, типом и преподавателем считаем переносом
+        pending = {}
+        for slot, lesson in removed.items():
+            pending.setdefault(self._identity(lesson), []).append(slot)
+
+        for slot, lesson in new.items():
+            if slot in old:
+                continue
+
+            candidates = pending.get(self._identity(lesson))
+            if candidates:
+                old_lesson = removed.pop(candidates.pop())
+                fields = [field for field in ('date', 'time') + self.FIELDS
+                          if old_lesson.get(field) != lesson.get(field)]
+                changes.append(self._change('moved', old_lesson, lesson, fields))
+            else:
+                changes.append(self._change('added', None, lesson, []))
+
+        for lesson in removed.values():
+            changes.append(self._change('removed', lesson, None, []))
+
+        return changes
+
+    def _index(self, schedule):
+        index = {}
+        for day in schedule or []:
+            for lesson in day['lessons']:
+                record = {
+                    "date": day['date'],
+                    "time": MAIScheduleDB.normalize_time(lesson.get('time', '')),
+                    "subject": lesson.get('subject'),
+                    "type": lesson.get('type'),
+                    "teacher": lesson.get('teacher'),
+                    "classroom": lesson.get('classroom')
+                }
+                index[(record['date'], record['time'])] = record
+        return index
+
+    def _identity(self, lesson):
+        return (lesson.get('subject'), lesson.get('type'), lesson.get('teacher'))
+
+    def _change(self, change_type, old, new, fields):
+        return {
+            "change": change_type,
+            "old": old,
+            "new": new,
+            "fields": fields
+        }
+
 
 class MAIScheduleDB:
     def __init__(self, db_name='schedule.db'):
         self.db_name = db_name
+        self.differ = MAIScheduleDiff()
         self._init_db()
 
+    @staticmethod
+    def normalize_time(time_value):
+        time_parts = time_value.split(' – ')
+        return '-'.join(time_parts) if len(time_parts) > 1 else time_value
+
     def _init_db(self):
         with sqlite3.connect(self.db_name) as conn:
             cursor = conn.cursor()
@@ -342,10 +531,41 @@ class MAIScheduleDB:
                     teacher TEXT,
                     classroom TEXT, 
                     lesson_type TEXT,
+                    updated_at TEXT,
                     FOREIGN KEY (group_id) REFERENCES groups (id),
                     UNIQUE(group_id, week_number, datetime, time)
                 )
             ''')
+
+            # Миграция баз, созданных до появления updated_at
+            cursor.execute('PRAGMA table_info(schedule)')
+            columns = [row[1] for row in cursor.fetchall()]
+            if 'updated_at' not in columns:
+                cursor.execute('ALTER TABLE schedule ADD COLUMN updated_at TEXT')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_updated_at
+                ON schedule (updated_at)
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schedule_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    group_id INTEGER,
+                    week_number INTEGER,
+                    detected_at TEXT,
+                    change_type TEXT,
+                    fields TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    FOREIGN KEY (group_id) REFERENCES groups (id)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_changes_group_week
+                ON schedule_changes (group_id, week_number)
+            ''')
             conn.commit()
 
     def save_schedule(self, group_info, schedule_data):
@@ -364,20 +584,20 @@ class MAIScheduleDB:
 
             cursor.execute('SELECT id FROM groups WHERE name = ?', (group_info['group'],))
             group_id = cursor.fetchone()[0]
+            updated_at = datetime.now().isoformat(timespec='seconds')
 
             for day in schedule_data:
                 datetime_str = f"{day['date']}"
 
                 for lesson in day['lessons']:
-                    time_parts = lesson.get('time', '').split(' – ')
-                    time_str = '-'.join(time_parts) if len(time_parts) > 1 else lesson.get('time', '')
+                    time_str = self.normalize_time(lesson.get('time', ''))
 
                     cursor.execute('''
                         INSERT OR REPLACE INTO schedule (
                             group_id, week_number, datetime, time,
-                            subject, teacher, classroom, lesson_type
+                            subject, teacher, classroom, lesson_type, updated_at
                         )
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                     ''', (
                         group_id,
                         group_info['week'],
@@ -386,7 +606,8 @@ class MAIScheduleDB:
                         lesson.get('subject'),
                         lesson.get('teacher'),
                         lesson.get('classroom'),
-                        lesson.get('type')
+                        lesson.get('type'),
+                        updated_at
                     ))
 
             conn.commit()
@@ -453,9 +674,507 @@ class MAIScheduleDB:
 
             return schedule
 
+    def update_schedule(self, group_info, schedule_data):
+        # Сравнивает новое расписание с сохранённым и записывает только изменения.
+        # Возвращает список изменений или None, если в БД ещё нет занятий этой недели
+        stored = self.get_schedule(group_info['group'], group_info['week'])
+        if not stored:
+            self.save_schedule(group_info, schedule_data)
+            return None
+
+        if not any(day['lessons'] for day in schedule_data):
+            # Пустой разбор при сохранённой неделе обычно означает недогруженную страницу,
+            # а не отмену всех занятий, поэтому сохранённые данные не трогаем
+            raise ValueError("Пустое расписание: страница загружена не полностью")
+
+        changes = self.differ.compare(stored, schedule_data)
+        if not changes:
+            return changes
+
+        with sqlite3.connect(self.db_name) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT id FROM groups WHERE name = ?', (group_info['group'],))
+            group_id = cursor.fetchone()[0]
+            detected_at = datetime.now().isoformat(timespec='seconds')
+
+            for change in changes:
+                old, new = change['old'], change['new']
+
+                if old and change['change'] != 'modified':
+                    cursor.execute('''
+                        DELETE FROM schedule
+                        WHERE group_id = ? AND week_number = ? AND datetime = ? AND time = ?
+                    ''', (group_id, group_info['week'], old['date'], old['time']))
+
+                if new:
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO schedule (
+                            group_id, week_number, datetime, time,
+                            subject, teacher, classroom, lesson_type, updated_at
+                        )
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        group_id,
+                        group_info['week'],
+                        new['date'],
+                        new['time'],
+                        new['subject'],
+                        new['teacher'],
+                        new['classroom'],
+                        new['type'],
+                        detected_at
+                    ))
+
+                cursor.execute('''
+                    INSERT INTO schedule_changes (
+                        group_id, week_number, detected_at, change_type,
+                        fields, old_value, new_value
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    group_id,
+                    group_info['week'],
+                    detected_at,
+                    change['change'],
+                    json.dumps(change['fields'], ensure_ascii=False),
+                    json.dumps(old, ensure_ascii=False) if old else None,
+                    json.dumps(new, ensure_ascii=False) if new else None
+                ))
+
+            conn.commit()
+
+        return changes
+
+    def get_changes(self, group_name, week_number=None, limit=50):
+        with sqlite3.connect(self.db_name) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT c.week_number, c.detected_at, c.change_type,
+                       c.fields, c.old_value, c.new_value
+                FROM schedule_changes c
+                JOIN groups g ON g.id = c.group_id
+                WHERE g.name = ?
+            '''
+            params = [group_name]
+
+            if week_number:
+                query += ' AND c.week_number = ?'
+                params.append(week_number)
+
+            query += ' ORDER BY c.id DESC LIMIT ?'
+            params.append(limit)
+
+            cursor.execute(query, params)
+
+            return [{
+                "week_number": row['week_number'],
+                "detected_at": row['detected_at'],
+                "change": row['change_type'],
+                "fields": json.loads(row['fields'] or '[]'),
+                "old": json.loads(row['old_value']) if row['old_value'] else None,
+                "new": json.loads(row['new_value']) if row['new_value'] else None
+            } for row in cursor.fetchall()]
+
+    def export_snapshot(self, path, week_number=None, since=None):
+        # Построчный gzip-JSON: заголовок, группы, затем занятия.
+        # Строки читаются курсором по одной, память не зависит от размера БД
+        counts = {"groups": 0, "lessons": 0, "removed": 0}
+
+        with sqlite3.connect(self.db_name) as conn, gzip.open(path, 'wt', encoding='utf-8') as f:
+            conn.row_factory = sqlite3.Row
+
+            header = {
+                "type": "header",
+                "version": 1,
+                "kind": "delta" if since else "snapshot",
+                "week_number": week_number,
+                "since": since,
+                "exported_at": datetime.now().isoformat(timespec='seconds')
+            }
+            f.write(json.dumps(header, ensure_ascii=False) + '\n')
+
+            for row in conn.execute('''
+                SELECT name, institute, course, education_type
+                FROM groups
+                ORDER BY id
+            '''):
+                record = dict(row)
+                record["type"] = "group"
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                counts["groups"] += 1
+
+            # В дельту попадают удалённые и перенесённые занятия, чтобы их старые слоты
+            # были удалены до применения новых строк
+            if since:
+                query = '''
+                    SELECT g.name AS "group", c.week_number, c.old_value
+                    FROM schedule_changes c
+                    JOIN groups g ON g.id = c.group_id
+                    WHERE c.detected_at >= ? AND c.change_type IN ('removed', 'moved')
+                '''
+                params = [since]
+
+                if week_number:
+                    query += ' AND c.week_number = ?'
+                    params.append(week_number)
+
+                for row in conn.execute(query + ' ORDER BY c.id', params):
+                    old = json.loads(row['old_value'])
+                    record = {
+                        "type": "removed",
+                        "group": row['group'],
+                        "week_number": row['week_number'],
+                        "datetime": old['date'],
+                        "time": old['time']
+                    }
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    counts["removed"] += 1
+
+            query = '''
+                SELECT g.name AS "group", s.week_number, s.datetime, s.time,
+                       s.subject, s.teacher, s.classroom, s.lesson_type, s.updated_at
+                FROM schedule s
+                JOIN groups g ON g.id = s.group_id
+                WHERE 1 = 1
+            '''
+            params = []
+
+            if week_number:
+                query += ' AND s.week_number = ?'
+                params.append(week_number)
+
+            if since:
+                # Метки хранятся с точностью до секунды; граничные строки отправляются
+                # повторно, что безопасно для идемпотентного импорта
+                query += ' AND s.updated_at >= ?'
+                params.append(since)
+
+            # Занятия одной недели идут подряд, чтобы импорт заменял неделю одной транзакцией
+            query += ' ORDER BY s.group_id, s.week_number, s.datetime, s.time'
+
+            for row in conn.execute(query, params):
+                record = dict(row)
+                record["type"] = "lesson"
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                counts["lessons"] += 1
+
+        return counts
+
+    def import_snapshot(self, path, batch_size=500, cache_dir=None):
+        # Если указан cache_dir, файлы кэша затронутых недель удаляются после импорта
+        counts = {"groups": 0, "lessons": 0, "removed": 0}
+        group_ids = {}
+        affected_weeks = set()
+        batch = []
+
+        with sqlite3.connect(self.db_name) as conn, gzip.open(path, 'rt', encoding='utf-8') as f:
+            cursor = conn.cursor()
+
+            header = json.loads(f.readline() or '{}')
+            if header.get("type") != "header" or header.get("version") != 1:
+                raise ValueError(f"Неподдерживаемый формат снимка: {path}")
+
+            # Полный снимок заменяет покрытые им недели, дельта только дополняет
+            replace_weeks = header.get("kind") == "snapshot"
+
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+
+                if record["type"] == "group":
+                    cursor.execute('''
+                        INSERT INTO groups (name, institute, course, education_type)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(name) DO UPDATE SET
+                            institute = excluded.institute,
+                            course = excluded.course,
+                            education_type = excluded.education_type
+                    ''', (
+                        record["name"],
+                        record.get("institute"),
+                        record.get("course"),
+                        record.get("education_type")
+                    ))
+                    counts["groups"] += 1
+
+                elif record["type"] in ("lesson", "removed"):
+                    group_id = group_ids.get(record["group"])
+                    if group_id is None:
+                        cursor.execute('SELECT id FROM groups WHERE name = ?', (record["group"],))
+                        row = cursor.fetchone()
+                        if not row:
+                            continue
+                        group_id = group_ids[record["group"]] = row[0]
+
+                    week_key = (record["group"], record["week_number"])
+                    new_week = week_key not in affected_weeks
+                    affected_weeks.add(week_key)
+
+                    if record["type"] == "removed":
+                        cursor.execute('''
+                            DELETE FROM schedule
+                            WHERE group_id = ? AND week_number = ? AND datetime = ? AND time = ?
+                        ''', (group_id, record["week_number"], record["datetime"], record["time"]))
+                        counts["removed"] += 1
+                        continue
+
+                    if new_week:
+                        # Фиксируем только на границе недель: удаление старых строк недели
+                        # и вставка новых попадают в одну транзакцию
+                        if len(batch) >= batch_size:
+                            counts["lessons"] += self._upsert_lessons(cursor, batch)
+                            conn.commit()
+                            batch.clear()
+
+                        if replace_weeks:
+                            cursor.execute('''
+                                DELETE FROM schedule
+                                WHERE group_id = ? AND week_number = ?
+                            ''', (group_id, record["week_number"]))
+
+                    batch.append((
+                        group_id,
+                        record["week_number"],
+                        record["datetime"],
+                        record["time"],
+                        record.get("subject"),
+                        record.get("teacher"),
+                        record.get("classroom"),
+                        record.get("lesson_type"),
+                        record.get("updated_at")
+                    ))
+
+            if batch:
+                counts["lessons"] += self._upsert_lessons(cursor, batch)
+            conn.commit()
+
+        if cache_dir:
+            for group, week in affected_weeks:
+                cache_file = os.path.join(cache_dir, f"{group}_week{week}.json")
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
+
+        return counts
+
+    def _upsert_lessons(self, cursor, batch):
+        cursor.executemany('''
+            INSERT INTO schedule (
+                group_id, week_number, datetime, time,
+                subject, teacher, classroom, lesson_type, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(group_id, week_number, datetime, time) DO UPDATE SET
+                subject = excluded.subject,
+                teacher = excluded.teacher,
+                classroom = excluded.classroom,
+                lesson_type = excluded.lesson_type,
+                updated_at = excluded.updated_at
+        ''', batch)
+        return len(batch)
+
+
+class NetworkFilterProfile:
+    # Шаблоны URL для Network.setBlockedURLs по типам ресурсов
+    RESOURCE_PATTERNS = {
+        'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+        'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.ogg*', '*.wav*', '*.avi*'],
+        'stylesheet': ['*.css*'],
+        'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.svg*', '*.webp*', '*.ico*'],
+    }
+
+    # Сторонние домены аналитики и трекеров на mai.ru
+    THIRD_PARTY_DOMAINS = [
+        'mc.yandex.ru',
+        'yandex.ru/metrika',
+        'google-analytics.com',
+        'googletagmanager.com',
+        'doubleclick.net',
+        'top-fwz1.mail.ru',
+        'vk.com',
+        'userapi.com',
+        'fonts.googleapis.com',
+        'fonts.gstatic.com',
+    ]
+
+    # stylesheet не блокируется по умолчанию: ожидания видимости и кликабельности
+    # на странице расписания зависят от CSS Bootstrap (collapse, вкладки, баннер cookie)
+    def __init__(self, resource_types=('font', 'media'), blocked_domains=None,
+                 page_load_strategy='eager'):
+        unknown = set(resource_types) - set(self.RESOURCE_PATTERNS)
+        if unknown:
+            raise ValueError(f"Неизвестные типы ресурсов: {', '.join(sorted(unknown))}")
+
+        self.resource_types = tuple(resource_types)
+        self.blocked_domains = list(self.THIRD_PARTY_DOMAINS if blocked_domains is None else blocked_domains)
+        self.page_load_strategy = page_load_strategy
+
+    def url_patterns(self):
+        patterns = []
+        for resource_type in self.resource_types:
+            patterns.extend(self.RESOURCE_PATTERNS[resource_type])
+        for domain in self.blocked_domains:
+            patterns.append(f"*{domain}*")
+        return patterns
+
+    def apply_options(self, chrome_options):
+        chrome_options.page_load_strategy = self.page_load_strategy
+        # Журнал производительности нужен для подсчёта запросов и трафика
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    def attach(self, driver):
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.url_patterns()})
+
+    def reset_stats(self, driver):
+        try:
+            driver.get_log("performance")
+        except Exception as e:
+            pass
+
+    def collect_stats(self, driver):
+        stats = {
+            "requests": 0,
+            "blocked_requests": 0,
+            "bytes_loaded": 0,
+            "bytes_saved_estimate": 0
+        }
+
+        try:
+            entries = driver.get_log("performance")
+        except Exception as e:
+            return stats
+
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get("method")
+            params = message.get("params", {})
+
+            if method == "Network.requestWillBeSent":
+                stats["requests"] += 1
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                stats["blocked_requests"] += 1
+            elif method == "Network.loadingFinished":
+                stats["bytes_loaded"] += int(params.get("encodedDataLength", 0))
+
+        # Размер заблокированных ответов неизвестен, оцениваем по среднему загруженному
+        loaded = stats["requests"] - stats["blocked_requests"]
+        if loaded > 0:
+            stats["bytes_saved_estimate"] = stats["bytes_loaded"] // loaded * stats["blocked_requests"]
+
+        return stats
+
+
+class DriverSupervisor:
+    def __init__(self, driver_factory, max_pages=50, max_rss_mb=1024, max_failures=3, max_retries=1):
+        self.driver_factory = driver_factory
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_failures = max_failures
+        self.max_retries = max_retries
+
+        self._driver = None
+        self.pages_served = 0
+        self.consecutive_failures = 0
+        self.restarts = 0
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self.driver_factory()
+            self.pages_served = 0
+            self.consecutive_failures = 0
+        return self._driver
+
+    def is_alive(self):
+        if self._driver is None:
+            return False
+        try:
+            self._driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            # Если упал сам chromedriver, HTTP-клиент бросает ошибки urllib3, а не WebDriverException
+            return False
+
+    def rss_mb(self):
+        # Память chromedriver и всех процессов Chrome, запущенных им
+        if psutil is None or self._driver is None:
+            return None
+        try:
+            process = psutil.Process(self._driver.service.process.pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            return rss / (1024 * 1024)
+        except (AttributeError, psutil.Error):
+            return None
+
+    def health(self):
+        return {
+            "alive": self.is_alive(),
+            "pages_served": self.pages_served,
+            "rss_mb": self.rss_mb(),
+            "consecutive_failures": self.consecutive_failures,
+            "restarts": self.restarts
+        }
+
+    def run(self, job, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = job(*args)
+            except Exception as e:
+                self.consecutive_failures += 1
+                crashed = not self.is_alive()
+                if crashed or self.consecutive_failures >= self.max_failures:
+                    self.restart()
+                if crashed and attempt < self.max_retries:
+                    continue
+                return None
+
+            self.pages_served += 1
+            self.consecutive_failures = 0
+            self._recycle_if_needed()
+            return result
+
+        return None
+
+    def _recycle_if_needed(self):
+        if self.max_pages and self.pages_served >= self.max_pages:
+            self.restart()
+            return
+
+        rss = self.rss_mb()
+        if self.max_rss_mb and rss is not None and rss >= self.max_rss_mb:
+            self.restart()
+
+    def restart(self):
+        self.quit()
+        self.restarts += 1
+
+    def quit(self):
+        if self._driver is None:
+            return
+        try:
+            self._driver.quit()
+        except Exception as e:
+            pass
+        finally:
+            self._driver = None
+
 
 class MAIScheduleParser:
-    def __init__(self):
+    def __init__(self, network_profile=None, max_pages_per_driver=50, max_driver_rss_mb=1024,
+                 max_driver_failures=3):
         self.cache_dir = "schedule_cache"
         os.makedirs(self.cache_dir, exist_ok=True)
 
@@ -481,16 +1200,40 @@ class MAIScheduleParser:
         }
         chrome_options.add_experimental_option("prefs", prefs)
 
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
+        self.network_profile = network_profile or NetworkFilterProfile()
+        self.network_profile.apply_options(chrome_options)
+        self.last_fetch_stats = None
+
+        self.chrome_options = chrome_options
+        self.driver_path = ChromeDriverManager().install()
+
+        # Драйвер запускается при первом обращении и перезапускается супервизором
+        self.supervisor = DriverSupervisor(
+            self._create_driver,
+            max_pages=max_pages_per_driver,
+            max_rss_mb=max_driver_rss_mb,
+            max_failures=max_driver_failures
         )
+        atexit.register(self.supervisor.quit)
 
-        self.driver.set_page_load_timeout(30)
-        self.driver.implicitly_wait(5)
         self.db = MAIScheduleDB()
         self.gcal = GoogleCalendarManager()
 
+    @property
+    def driver(self):
+        return self.supervisor.driver
+
+    def _create_driver(self):
+        driver = webdriver.Chrome(
+            service=Service(self.driver_path),
+            options=self.chrome_options
+        )
+
+        self.network_profile.attach(driver)
+        driver.set_page_load_timeout(30)
+        driver.implicitly_wait(5)
+        return driver
+
     def parse_schedule(self, html):
         soup = BeautifulSoup(html, 'html.parser')
         schedule = []
@@ -554,6 +1297,9 @@ class MAIScheduleParser:
         with open(cache_file, 'w', encoding='utf-8') as f:
             json.dump(schedule, f, ensure_ascii=False, indent=2)
 
+    def import_snapshot(self, path):
+        return self.db.import_snapshot(path, cache_dir=self.cache_dir)
+
     def click_week_button(self):
         try:
             week_button = WebDriverWait(self.driver, 20).until(
@@ -578,76 +1324,88 @@ class MAIScheduleParser:
             return False
 
     def fetch_schedule(self, group, week, faculty_name, course_number, education_type):
+        return self.supervisor.run(
+            self._fetch_schedule_job,
+            group, week, faculty_name, course_number, education_type
+        )
+
+    def _fetch_schedule_job(self, group, week, faculty_name, course_number, education_type):
         try:
-            self.driver.get("https://mai.ru/education/studies/schedule/")
+            self.network_profile.reset_stats(self.driver)
+            return self._fetch_schedule_page(group, week, faculty_name, course_number, education_type)
+        finally:
+            # Не обращаемся к self.driver: при неудачном запуске это повторно вызвало бы фабрику
+            driver = self.supervisor._driver
+            self.last_fetch_stats = self.network_profile.collect_stats(driver) if driver else None
 
-            try:
-                cookie_banner = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.ID, "cookie_message"))
-                )
-                accept_button = cookie_banner.find_element(By.XPATH, ".//button[contains(text(), 'Принять')]")
-                accept_button.click()
-                time.sleep(1)
-            except:
-                pass
-
-            department_select = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "department"))
-            )
-            department_select.click()
+    def _fetch_schedule_page(self, group, week, faculty_name, course_number, education_type):
+        self.driver.get("https://mai.ru/education/studies/schedule/")
 
-            try:
-                department_option = self.driver.find_element(By.XPATH,
-                                                             f"//select[@id='department']/option[contains(text(), '{faculty_name}')]")
-                department_option.click()
-            except:
-                pass
-
-            course_select = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "course"))
+        try:
+            cookie_banner = WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.ID, "cookie_message"))
             )
-            course_select.click()
+            accept_button = cookie_banner.find_element(By.XPATH, ".//button[contains(text(), 'Принять')]")
+            accept_button.click()
+            time.sleep(1)
+        except:
+            pass
 
-            try:
-                course_option = self.driver.find_element(By.XPATH,
-                                                         f"//select[@id='course']/option[@value='{course_number}']")
-                course_option.click()
-            except:
-                pass
-
-            show_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Отобразить')]"))
-            )
-            show_button.click()
-            time.sleep(2)
+        department_select = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "department"))
+        )
+        department_select.click()
 
-            nav_tabs = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "nav-segment"))
-            )
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", nav_tabs)
-            time.sleep(1)
+        try:
+            department_option = self.driver.find_element(By.XPATH,
+                                                         f"//select[@id='department']/option[contains(text(), '{faculty_name}')]")
+            department_option.click()
+        except:
+            pass
 
-            education_tab = self.driver.find_element(By.XPATH, f"//a[contains(text(), '{education_type}')]")
-            self.driver.execute_script("arguments[0].click();", education_tab)
+        course_select = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "course"))
+        )
+        course_select.click()
 
-            time.sleep(1)
+        try:
+            course_option = self.driver.find_element(By.XPATH,
+                                                     f"//select[@id='course']/option[@value='{course_number}']")
+            course_option.click()
+        except:
+            pass
 
-            group_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, f"//a[contains(@href, 'group={group}')]"))
-            )
-            group_button.click()
+        show_button = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Отобразить')]"))
+        )
+        show_button.click()
+        time.sleep(2)
 
-            self.click_week_button()
+        nav_tabs = WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "nav-segment"))
+        )
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", nav_tabs)
+        time.sleep(1)
 
-            week_element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH,
-                                            f"//div[@id='collapseWeeks']//a[contains(@href, 'week={week}')]"))
-            )
-            week_element.click()
+        education_tab = self.driver.find_element(By.XPATH, f"//a[contains(text(), '{education_type}')]")
+        self.driver.execute_script("arguments[0].click();", education_tab)
 
-            return self.driver.page_source
-        except Exception as e:
-            return None
+        time.sleep(1)
+
+        group_button = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, f"//a[contains(@href, 'group={group}')]"))
+        )
+        group_button.click()
+
+        self.click_week_button()
+
+        week_element = WebDriverWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH,
+                                        f"//div[@id='collapseWeeks']//a[contains(@href, 'week={week}')]"))
+        )
+        week_element.click()
+
+        return self.driver.page_source
 
     def decode_group(self, group):
         group = group.split("-")
@@ -717,28 +1475,54 @@ class MAIScheduleParser:
 
                 for lesson in lesson_day['lessons']:
                     try:
-                        start_time, end_time = self._parse_time(lesson['time'])
-                        start_datetime = f"{date_str}T{start_time}+03:00"
-                        end_datetime = f"{date_str}T{end_time}+03:00"
-
-                        self.gcal.create_event(
-                            summary=f"{lesson.get('subject', 'Занятие')} ({lesson.get('type', '')})",
-                            start_time=start_datetime,
-                            end_time=end_datetime,
-                            description=f"Группа: {group_name}\nПреподаватель: {lesson.get('teacher', 'не указан')}",
-                            location=f"Аудитория: {lesson.get('classroom', 'не указана')}"
-                        )
-
+                        self._create_lesson_event(group_name, date_str, lesson)
                     except Exception as e:
                         continue
 
             except Exception as e:
                 continue
 
+    def _apply_changes_to_google_calendar(self, group_name, changes):
+        # Переносит в календарь только изменения: старые события удаляются, новые создаются
+        for change in changes:
+            try:
+                old, new = change['old'], change['new']
+
+                if old:
+                    start_datetime, end_datetime = self._lesson_datetimes(self._parse_date(old['date']), old)
+                    self.gcal.delete_events(self._lesson_summary(old), start_datetime, end_datetime)
+
+                if new:
+                    self._create_lesson_event(group_name, self._parse_date(new['date']), new)
+
+            except Exception as e:
+                continue
+
+    def _lesson_summary(self, lesson):
+        return f"{lesson.get('subject', 'Занятие')} ({lesson.get('type', '')})"
+
+    def _lesson_datetimes(self, date_str, lesson):
+        start_time, end_time = self._parse_time(lesson['time'])
+        return f"{date_str}T{start_time}+03:00", f"{date_str}T{end_time}+03:00"
+
+    def _create_lesson_event(self, group_name, date_str, lesson):
+        start_datetime, end_datetime = self._lesson_datetimes(date_str, lesson)
+
+        self.gcal.create_event(
+            summary=self._lesson_summary(lesson),
+            start_time=start_datetime,
+            end_time=end_datetime,
+            description=f"Группа: {group_name}\nПреподаватель: {lesson.get('teacher', 'не указан')}",
+            location=f"Аудитория: {lesson.get('classroom', 'не указана')}"
+        )
+
     def run(self):
         root = tk.Tk()
         app = MAIScheduleApp(root, self)
-        root.mainloop()
+        try:
+            root.mainloop()
+        finally:
+            self.supervisor.quit()
 
 
 if __name__ == "__main__":
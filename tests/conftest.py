@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main'))
+
+
+GROUP_INFO = {
+    'group': 'М8О-104БВ-24',
+    'institute': 'Институт №8',
+    'course': '1',
+    'education_type': 'Базовое высшее образование'
+}
+
+
+def lesson(time, subject, classroom, lesson_type='ЛК', teacher='Иванов И.И.'):
+    return {
+        'time': time,
+        'subject': subject,
+        'teacher': teacher,
+        'classroom': classroom,
+        'type': lesson_type
+    }
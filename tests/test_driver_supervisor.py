@@ -0,0 +1,109 @@
+import pytest
+
+main = pytest.importorskip("main")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class FakeDriver:
+    def __init__(self):
+        self.crashed = False
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if self.crashed:
+            # Так ведёт себя urllib3, когда процесс chromedriver уже завершён
+            raise ProtocolError("Connection aborted")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverFactory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+
+def test_crashed_driver_is_restarted_and_job_retried():
+    factory = DriverFactory()
+    supervisor = main.DriverSupervisor(factory, max_retries=1)
+    calls = []
+
+    def job():
+        driver = supervisor.driver
+        calls.append(driver)
+        if len(calls) == 1:
+            driver.crashed = True
+            raise ProtocolError("Connection aborted")
+        return "html"
+
+    assert supervisor.run(job) == "html"
+    assert len(factory.drivers) == 2
+    assert calls == factory.drivers
+    assert factory.drivers[0].quit_called
+    assert supervisor.restarts == 1
+    assert supervisor.consecutive_failures == 0
+
+
+def test_failures_on_live_driver_are_not_retried():
+    factory = DriverFactory()
+    supervisor = main.DriverSupervisor(factory, max_failures=2)
+
+    def job():
+        supervisor.driver
+        raise TimeoutError("element not found")
+
+    assert supervisor.run(job) is None
+    assert supervisor.consecutive_failures == 1
+    assert len(factory.drivers) == 1
+
+    assert supervisor.run(job) is None
+    assert supervisor.restarts == 1
+    assert factory.drivers[0].quit_called
+
+
+def test_driver_is_recycled_after_max_pages():
+    factory = DriverFactory()
+    supervisor = main.DriverSupervisor(factory, max_pages=2)
+
+    def job():
+        return supervisor.driver
+
+    first = supervisor.run(job)
+    assert supervisor.run(job) is first
+    assert first.quit_called
+
+    assert supervisor.run(job) is not first
+    assert len(factory.drivers) == 2
+
+
+def test_quit_without_driver_is_noop():
+    supervisor = main.DriverSupervisor(DriverFactory())
+
+    supervisor.quit()
+
+    assert not supervisor.is_alive()
+
+
+def test_failed_driver_start_does_not_restart_for_stats():
+    attempts = []
+
+    def failing_factory():
+        attempts.append(1)
+        raise RuntimeError("chrome failed to start")
+
+    parser = object.__new__(main.MAIScheduleParser)
+    parser.network_profile = main.NetworkFilterProfile()
+    parser.supervisor = main.DriverSupervisor(failing_factory, max_retries=0)
+
+    assert parser.fetch_schedule("М8О-104БВ-24", 1, "Институт №8", "1", "") is None
+    assert len(attempts) == 1
+    assert parser.last_fetch_stats is None
@@ -0,0 +1,170 @@
+import functools
+import json
+import shutil
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+main = pytest.importorskip("main")
+
+
+def perf_entry(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class FakeDriver:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def test_url_patterns_cover_resource_types_and_domains():
+    profile = main.NetworkFilterProfile(resource_types=('font', 'stylesheet'), blocked_domains=['mc.yandex.ru'])
+    patterns = profile.url_patterns()
+
+    assert '*.woff2*' in patterns
+    assert '*.css*' in patterns
+    assert '*mc.yandex.ru*' in patterns
+    assert '*.mp4*' not in patterns
+
+
+def test_default_profile_keeps_stylesheets():
+    profile = main.NetworkFilterProfile()
+
+    assert '*.css*' not in profile.url_patterns()
+    assert profile.page_load_strategy == 'eager'
+
+
+def test_unknown_resource_type_is_rejected():
+    with pytest.raises(ValueError):
+        main.NetworkFilterProfile(resource_types=('font', 'video'))
+
+
+def test_collect_stats_counts_blocked_and_loaded_requests():
+    driver = FakeDriver([
+        perf_entry("Network.requestWillBeSent", requestId="1"),
+        perf_entry("Network.requestWillBeSent", requestId="2"),
+        perf_entry("Network.requestWillBeSent", requestId="3"),
+        perf_entry("Network.loadingFinished", requestId="1", encodedDataLength=3000),
+        perf_entry("Network.loadingFinished", requestId="2", encodedDataLength=1000),
+        perf_entry("Network.loadingFailed", requestId="3", blockedReason="inspector"),
+        perf_entry("Network.loadingFailed", requestId="4", errorText="net::ERR_FAILED"),
+        {"message": "not json"},
+    ])
+
+    stats = main.NetworkFilterProfile().collect_stats(driver)
+
+    assert stats == {
+        "requests": 3,
+        "blocked_requests": 1,
+        "bytes_loaded": 4000,
+        "bytes_saved_estimate": 2000
+    }
+
+
+def test_collect_stats_without_log_returns_zeros():
+    class BrokenDriver:
+        def get_log(self, log_type):
+            raise RuntimeError("no log")
+
+    stats = main.NetworkFilterProfile().collect_stats(BrokenDriver())
+
+    assert stats["requests"] == 0
+    assert stats["blocked_requests"] == 0
+
+
+FIXTURE_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+    <link rel="stylesheet" href="/style.css">
+    <link rel="preload" href="/font.woff2" as="font" type="font/woff2" crossorigin>
+    <script src="/app.js"></script>
+    <script src="http://mc.yandex.ru/metrika/tag.js"></script>
+</head>
+<body>
+    <video src="/clip.mp4" preload="auto"></video>
+    <p id="content">Расписание</p>
+</body>
+</html>
+'''
+
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    (tmp_path / "index.html").write_text(FIXTURE_PAGE, encoding="utf-8")
+    (tmp_path / "style.css").write_text("p { color: red; }" * 100)
+    (tmp_path / "app.js").write_text("var loaded = true;" * 100)
+    (tmp_path / "font.woff2").write_bytes(b"\0" * 4096)
+    (tmp_path / "clip.mp4").write_bytes(b"\0" * 4096)
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(tmp_path))
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def chrome_driver_factory():
+    if not (shutil.which("chromedriver") and (shutil.which("google-chrome") or shutil.which("chromium")
+                                                or shutil.which("chromium-browser"))):
+        pytest.skip("Chrome и chromedriver не установлены")
+
+    drivers = []
+
+    def factory(profile):
+        options = main.Options()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        profile.apply_options(options)
+        try:
+            driver = main.webdriver.Chrome(options=options)
+        except Exception as e:
+            pytest.skip(f"Не удалось запустить Chrome: {e}")
+        profile.attach(driver)
+        driver.set_page_load_timeout(30)
+        drivers.append(driver)
+        return driver
+
+    yield factory
+
+    for driver in drivers:
+        driver.quit()
+
+
+def test_profile_blocks_resources_on_fixture_server(fixture_server, chrome_driver_factory):
+    profile = main.NetworkFilterProfile(resource_types=('font', 'media', 'stylesheet'))
+    driver = chrome_driver_factory(profile)
+
+    profile.reset_stats(driver)
+    driver.get(fixture_server)
+    driver.find_element(main.By.ID, "content")
+    stats = profile.collect_stats(driver)
+
+    # Заблокированы css, шрифт, видео и трекер; загружены страница и app.js
+    assert stats["blocked_requests"] >= 4
+    assert stats["requests"] - stats["blocked_requests"] >= 2
+    assert stats["bytes_loaded"] > 0
+    assert stats["bytes_saved_estimate"] > 0
+
+
+def test_default_profile_loads_stylesheet_on_fixture_server(fixture_server, chrome_driver_factory):
+    # Трекер из фикстуры блокируется, чтобы тест не обращался к внешней сети
+    profile = main.NetworkFilterProfile(blocked_domains=['mc.yandex.ru'])
+    driver = chrome_driver_factory(profile)
+
+    driver.get(fixture_server)
+    color = driver.execute_script(
+        "return getComputedStyle(document.getElementById('content')).color"
+    )
+
+    assert color == "rgb(255, 0, 0)"
@@ -0,0 +1,192 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+from conftest import GROUP_INFO, lesson
+
+main = pytest.importorskip("main")
+
+
+WEEK_1 = [
+    {'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-416'),
+        lesson('10:45 – 12:15', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]},
+    {'date': 'Вт, 2 сентября', 'lessons': [
+        lesson('13:00 – 14:30', 'Программирование', '3-405', 'ЛР'),
+    ]},
+]
+
+WEEK_2 = [
+    {'date': 'Пн, 8 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Линейная алгебра', 'ГУК Б-416'),
+    ]},
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    db = main.MAIScheduleDB(str(tmp_path / "source.db"))
+    db.save_schedule(dict(GROUP_INFO, week=1), WEEK_1)
+    db.save_schedule(dict(GROUP_INFO, week=2), WEEK_2)
+    return db
+
+
+@pytest.fixture
+def replica(tmp_path):
+    return main.MAIScheduleDB(str(tmp_path / "replica.db"))
+
+
+def read_snapshot(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_snapshot_round_trip(source, replica, tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+
+    exported = source.export_snapshot(path)
+    imported = replica.import_snapshot(path, batch_size=2)
+
+    assert exported == {"groups": 1, "lessons": 4, "removed": 0}
+    assert imported == exported
+    assert replica.get_schedule(GROUP_INFO['group'], 1) == source.get_schedule(GROUP_INFO['group'], 1)
+    assert replica.get_schedule(GROUP_INFO['group'], 2) == source.get_schedule(GROUP_INFO['group'], 2)
+
+
+def test_import_is_idempotent_upsert(source, replica, tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    source.export_snapshot(path)
+
+    replica.import_snapshot(path)
+    replica.import_snapshot(path)
+
+    with sqlite3.connect(replica.db_name) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM schedule').fetchone()[0] == 4
+        assert conn.execute('SELECT COUNT(*) FROM groups').fetchone()[0] == 1
+
+
+def test_export_filters_by_week(source, tmp_path):
+    path = str(tmp_path / "week2.jsonl.gz")
+
+    counts = source.export_snapshot(path, week_number=2)
+    records = read_snapshot(path)
+
+    assert counts["lessons"] == 1
+    assert records[0]["kind"] == "snapshot"
+    assert [r["week_number"] for r in records if r["type"] == "lesson"] == [2]
+
+
+def test_export_delta_since(source, tmp_path):
+    with sqlite3.connect(source.db_name) as conn:
+        conn.execute("UPDATE schedule SET updated_at = '2024-01-01T00:00:00' WHERE week_number = 1")
+
+    path = str(tmp_path / "delta.jsonl.gz")
+    counts = source.export_snapshot(path, since='2024-06-01T00:00:00')
+    records = read_snapshot(path)
+
+    assert counts["lessons"] == 1
+    assert records[0]["kind"] == "delta"
+    assert records[0]["since"] == '2024-06-01T00:00:00'
+    assert [r["subject"] for r in records if r["type"] == "lesson"] == ['Линейная алгебра']
+
+
+def test_import_rejects_unknown_format(replica, tmp_path):
+    path = str(tmp_path / "bad.jsonl.gz")
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({"type": "header", "version": 99}) + '\n')
+
+    with pytest.raises(ValueError):
+        replica.import_snapshot(path)
+
+
+def test_import_invalidates_cache_of_affected_weeks(source, replica, tmp_path):
+    cache_dir = tmp_path / "schedule_cache"
+    cache_dir.mkdir()
+    stale = cache_dir / f"{GROUP_INFO['group']}_week2.json"
+    untouched = cache_dir / f"{GROUP_INFO['group']}_week5.json"
+    stale.write_text('{"schedule": []}', encoding='utf-8')
+    untouched.write_text('{"schedule": []}', encoding='utf-8')
+
+    path = str(tmp_path / "week2.jsonl.gz")
+    source.export_snapshot(path, week_number=2)
+    replica.import_snapshot(path, cache_dir=str(cache_dir))
+
+    assert not stale.exists()
+    assert untouched.exists()
+
+
+def test_updated_at_migration(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE schedule (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                group_id INTEGER,
+                week_number INTEGER,
+                datetime TEXT,
+                time TEXT,
+                subject TEXT,
+                teacher TEXT,
+                classroom TEXT,
+                lesson_type TEXT,
+                UNIQUE(group_id, week_number, datetime, time)
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO schedule (group_id, week_number, datetime, time, subject)
+            VALUES (1, 1, 'Пн, 1 сентября', '09:00-10:30', 'Физика')
+        ''')
+
+    db = main.MAIScheduleDB(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(schedule)')]
+        row = conn.execute('SELECT subject, updated_at FROM schedule').fetchone()
+
+    assert 'updated_at' in columns
+    assert row == ('Физика', None)
+
+    db.save_schedule(dict(GROUP_INFO, week=1), WEEK_1)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*) FROM schedule WHERE updated_at IS NOT NULL').fetchone()[0] == 3
+
+
+def test_full_snapshot_replaces_covered_weeks_on_replica(source, replica, tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    source.export_snapshot(path)
+    replica.import_snapshot(path)
+    replica.save_schedule(dict(GROUP_INFO, week=7), WEEK_2)
+
+    # На источнике отменена физика
+    source.update_schedule(dict(GROUP_INFO, week=1), [
+        {'date': 'Пн, 1 сентября', 'lessons': [WEEK_1[0]['lessons'][0]]},
+        WEEK_1[1],
+    ])
+
+    resync = str(tmp_path / "resync.jsonl.gz")
+    source.export_snapshot(resync)
+    replica.import_snapshot(resync, batch_size=1)
+
+    assert replica.get_schedule(GROUP_INFO['group'], 1) == source.get_schedule(GROUP_INFO['group'], 1)
+    assert replica.get_schedule(GROUP_INFO['group'], 2) == source.get_schedule(GROUP_INFO['group'], 2)
+    # Неделя, которой нет в снимке, не затрагивается
+    assert replica.get_schedule(GROUP_INFO['group'], 7)
+
+
+def test_delta_since_previous_export_keeps_same_second_changes(source, tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    source.export_snapshot(path)
+    exported_at = read_snapshot(path)[0]["exported_at"]
+
+    with sqlite3.connect(source.db_name) as conn:
+        conn.execute("UPDATE schedule SET classroom = 'ГУК Б-520', updated_at = ? WHERE subject = 'Физика'",
+                     (exported_at,))
+
+    delta = str(tmp_path / "delta.jsonl.gz")
+    counts = source.export_snapshot(delta, since=exported_at)
+
+    assert counts["lessons"] >= 1
+    assert 'ГУК Б-520' in [r["classroom"] for r in read_snapshot(delta) if r["type"] == "lesson"]
@@ -0,0 +1,164 @@
+import pytest
+
+from conftest import GROUP_INFO, lesson
+
+main = pytest.importorskip("main")
+
+
+WEEK_INFO = dict(GROUP_INFO, week=1)
+
+WEEK = [
+    {'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-416'),
+        lesson('10:45 – 12:15', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]},
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return main.MAIScheduleDB(str(tmp_path / "schedule.db"))
+
+
+def test_first_update_saves_without_changes(db):
+    assert db.update_schedule(WEEK_INFO, WEEK) is None
+    assert db.get_schedule(WEEK_INFO['group'], 1)
+    assert db.get_changes(WEEK_INFO['group'], 1) == []
+
+
+@pytest.mark.parametrize("parsed", [[], [{'date': 'Пн, 1 сентября', 'lessons': []}]])
+def test_empty_first_fetch_is_saved(db, parsed):
+    assert db.update_schedule(WEEK_INFO, parsed) is None
+    assert db.get_schedule(WEEK_INFO['group'], 1) == []
+    assert db.get_changes(WEEK_INFO['group'], 1) == []
+
+
+@pytest.mark.parametrize("parsed", [[], [{'date': 'Пн, 1 сентября', 'lessons': []}]])
+def test_empty_parse_is_rejected_and_keeps_stored_week(db, tmp_path, parsed):
+    db.update_schedule(WEEK_INFO, WEEK)
+    stored = db.get_schedule(WEEK_INFO['group'], 1)
+
+    with pytest.raises(ValueError):
+        db.update_schedule(WEEK_INFO, parsed)
+
+    assert db.get_schedule(WEEK_INFO['group'], 1) == stored
+    assert db.get_changes(WEEK_INFO['group'], 1) == []
+
+    path = str(tmp_path / "delta.jsonl.gz")
+    assert db.export_snapshot(path, since='2000-01-01T00:00:00')["removed"] == 0
+
+
+def changes_by_type(changes):
+    result = {}
+    for change in changes:
+        result.setdefault(change['change'], []).append(change)
+    return result
+
+
+def test_compare_identical_weeks_has_no_changes():
+    assert main.MAIScheduleDiff().compare(WEEK, WEEK) == []
+
+
+def test_compare_normalizes_stored_time_format():
+    stored = [{'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00-10:30', 'Математический анализ', 'ГУК Б-416'),
+        lesson('10:45-12:15', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]}]
+
+    assert main.MAIScheduleDiff().compare(stored, WEEK) == []
+
+
+def test_compare_detects_modified_fields():
+    new = [{'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-520', teacher='Петров П.П.'),
+        lesson('10:45 – 12:15', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]}]
+
+    changes = main.MAIScheduleDiff().compare(WEEK, new)
+
+    assert len(changes) == 1
+    assert changes[0]['change'] == 'modified'
+    assert changes[0]['fields'] == ['teacher', 'classroom']
+    assert changes[0]['old']['classroom'] == 'ГУК Б-416'
+    assert changes[0]['new']['classroom'] == 'ГУК Б-520'
+
+
+def test_compare_detects_moved_lesson():
+    new = [
+        {'date': 'Пн, 1 сентября', 'lessons': [
+            lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-416'),
+        ]},
+        {'date': 'Ср, 3 сентября', 'lessons': [
+            lesson('13:00 – 14:30', 'Физика', 'ГУК В-101', 'ПЗ'),
+        ]},
+    ]
+
+    changes = main.MAIScheduleDiff().compare(WEEK, new)
+
+    assert len(changes) == 1
+    moved = changes[0]
+    assert moved['change'] == 'moved'
+    assert moved['fields'] == ['date', 'time', 'classroom']
+    assert (moved['old']['date'], moved['old']['time']) == ('Пн, 1 сентября', '10:45-12:15')
+    assert (moved['new']['date'], moved['new']['time']) == ('Ср, 3 сентября', '13:00-14:30')
+
+
+def test_compare_detects_added_and_removed():
+    new = [{'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-416'),
+        lesson('13:00 – 14:30', 'Программирование', '3-405', 'ЛР', teacher='Сидоров С.С.'),
+    ]}]
+
+    changes = changes_by_type(main.MAIScheduleDiff().compare(WEEK, new))
+
+    assert [c['new']['subject'] for c in changes['added']] == ['Программирование']
+    assert [c['old']['subject'] for c in changes['removed']] == ['Физика']
+    assert changes['added'][0]['old'] is None
+    assert changes['removed'][0]['new'] is None
+
+
+def test_compare_collapses_duplicate_slots():
+    duplicated = [{'date': 'Пн, 1 сентября', 'lessons': WEEK[0]['lessons'] + WEEK[0]['lessons'][:1]}]
+
+    assert main.MAIScheduleDiff().compare(WEEK, duplicated) == []
+    assert main.MAIScheduleDiff().compare(duplicated, WEEK) == []
+
+
+def test_compare_pairs_each_removed_lesson_with_one_move():
+    old = [{'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Физика', 'ГУК В-310', 'ПЗ'),
+        lesson('10:45 – 12:15', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]}]
+    new = [{'date': 'Вт, 2 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Физика', 'ГУК В-310', 'ПЗ'),
+    ]}]
+
+    changes = changes_by_type(main.MAIScheduleDiff().compare(old, new))
+
+    assert len(changes['moved']) == 1
+    assert len(changes['removed']) == 1
+    assert 'added' not in changes
+
+
+def test_update_schedule_records_history_and_replicates_removals(db, tmp_path):
+    db.update_schedule(WEEK_INFO, WEEK)
+    new = [{'date': 'Пн, 1 сентября', 'lessons': [
+        lesson('09:00 – 10:30', 'Математический анализ', 'ГУК Б-520'),
+    ]}]
+
+    changes = db.update_schedule(WEEK_INFO, new)
+    history = db.get_changes(WEEK_INFO['group'], 1)
+
+    assert sorted(c['change'] for c in changes) == ['modified', 'removed']
+    assert sorted(c['change'] for c in history) == ['modified', 'removed']
+    assert all(c['detected_at'] for c in history)
+    assert db.get_schedule(WEEK_INFO['group'], 1)[0]['lessons'][0]['classroom'] == 'ГУК Б-520'
+    assert db.update_schedule(WEEK_INFO, new) == []
+
+    replica = main.MAIScheduleDB(str(tmp_path / "replica.db"))
+    replica.save_schedule(WEEK_INFO, WEEK)
+    path = str(tmp_path / "delta.jsonl.gz")
+    db.export_snapshot(path, since='2000-01-01T00:00:00')
+
+    assert replica.import_snapshot(path)["removed"] == 1
+    assert replica.get_schedule(WEEK_INFO['group'], 1) == db.get_schedule(WEEK_INFO['group'], 1)